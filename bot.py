@@ -1,16 +1,25 @@
 import os
+import glob
+import tempfile
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import io
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 import pytz
-from telegram import Update
+from telegram import InputMediaPhoto, Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackContext
 from dotenv import load_dotenv
 import asyncio
 import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from apscheduler.events import EVENT_JOB_ERROR
 
 # ==================== LOGGING CONFIGURATION ====================
@@ -32,126 +41,421 @@ logging.getLogger('apscheduler').setLevel(logging.WARNING)  # Disable scheduler
 logger = logging.getLogger(__name__)
 # ===============================================================
 
+# Numba is optional: without it the @njit kernels below run as plain Python
+try:
+    from numba import njit
+except ImportError:
+    logger.warning("numba is not installed; indicator kernels will run as slow pure-Python loops")
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
+# Market hours (IST) as minutes since midnight
+IST = pytz.timezone('Asia/Kolkata')
+MARKET_OPEN_MIN = 9 * 60 + 15
+MARKET_CLOSE_MIN = 15 * 60 + 30
+
+# Shared pool for blocking yfinance downloads so scans don't stall the event loop
+DOWNLOAD_POOL = ThreadPoolExecutor(max_workers=16)
+
+# On-disk cache of completed daily bars, one parquet file per ticker/period/day
+CACHE_DIR = 'cache'
+
+# The strategy only reads Close and Volume, so everything else is dropped right after download.
+# Prices only carry ~6 significant digits, so they are kept as float32: indicator passes
+# read half the bytes while the kernels still accumulate in float64
+STRATEGY_COLUMNS = ['Close', 'Volume']
+
+def _trim(data):
+    return data.reindex(columns=STRATEGY_COLUMNS).astype('float32')
+
+def _close(data):
+    return data['Close'].to_numpy(dtype=np.float32)
+
 # Technical Indicators
-def calculate_ema(data, window):
-    return data['Close'].ewm(span=window, adjust=False).mean()
-
-def calculate_rsi(data, window=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(data):
-    ema12 = data['Close'].ewm(span=12, adjust=False).mean()
-    ema26 = data['Close'].ewm(span=26, adjust=False).mean()
-    macd_line = ema12 - ema26
-    signal_line = macd_line.ewm(span=9, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
+# Slots of the running indicator state advanced by _step. The first TAIL_SIZE slots
+# (CLOSE..MACD_HIST) are the values the strategy reads; tail rows use the same indices.
+(CLOSE, VOLUME, EMA_9, EMA_21, EMA_50, RSI, RSI_EMA_20, MACD_HIST,
+ EMA_12, EMA_26, MACD_SIGNAL, AVG_GAIN, AVG_LOSS,
+ VOLUME_1, VOLUME_2, VOLUME_3, VOLUME_4, BAR_COUNT) = range(18)
+STATE_SIZE = 18
+TAIL_SIZE = MACD_HIST + 1
+
+@njit(cache=True)
+def _step(state, price, volume):
+    # Advance every indicator by one daily bar, in place.
+    # VOLUME_1..VOLUME_4 hold the volumes of the four bars before the current one.
+    bars = state[BAR_COUNT]
+    if bars == 0:
+        state[EMA_9] = price
+        state[EMA_21] = price
+        state[EMA_50] = price
+        state[EMA_12] = price
+        state[EMA_26] = price
+        state[AVG_GAIN] = 0.0
+        state[AVG_LOSS] = 0.0
+        state[RSI] = np.nan
+        state[RSI_EMA_20] = np.nan
+        state[VOLUME_1:VOLUME_4 + 1] = np.nan
+    else:
+        state[EMA_9] += 2.0 / 10 * (price - state[EMA_9])
+        state[EMA_21] += 2.0 / 22 * (price - state[EMA_21])
+        state[EMA_50] += 2.0 / 51 * (price - state[EMA_50])
+        state[EMA_12] += 2.0 / 13 * (price - state[EMA_12])
+        state[EMA_26] += 2.0 / 27 * (price - state[EMA_26])
+
+        # RSI(14) uses Wilder smoothing, the recursive form of
+        # delta.clip(lower=0).ewm(alpha=1/14, adjust=False).mean() (and likewise for losses)
+        delta = price - state[CLOSE]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if bars == 1:
+            state[AVG_GAIN] = gain
+            state[AVG_LOSS] = loss
+        else:
+            state[AVG_GAIN] += 1.0 / 14 * (gain - state[AVG_GAIN])
+            state[AVG_LOSS] += 1.0 / 14 * (loss - state[AVG_LOSS])
+        if state[AVG_LOSS] > 0:
+            state[RSI] = 100.0 - 100.0 / (1.0 + state[AVG_GAIN] / state[AVG_LOSS])
+        elif state[AVG_GAIN] > 0:
+            state[RSI] = 100.0
+        else:
+            state[RSI] = np.nan
+        if not np.isnan(state[RSI]):
+            if np.isnan(state[RSI_EMA_20]):
+                state[RSI_EMA_20] = state[RSI]
+            else:
+                state[RSI_EMA_20] += 2.0 / 21 * (state[RSI] - state[RSI_EMA_20])
+
+        state[VOLUME_4] = state[VOLUME_3]
+        state[VOLUME_3] = state[VOLUME_2]
+        state[VOLUME_2] = state[VOLUME_1]
+        state[VOLUME_1] = state[VOLUME]
+
+    macd = state[EMA_12] - state[EMA_26]
+    if bars == 0:
+        state[MACD_SIGNAL] = macd
+    else:
+        state[MACD_SIGNAL] += 2.0 / 10 * (macd - state[MACD_SIGNAL])
+    state[MACD_HIST] = macd - state[MACD_SIGNAL]
+    state[CLOSE] = price
+    state[VOLUME] = volume
+    state[BAR_COUNT] = bars + 1
+
+@njit(cache=True)
+def _fold(close, volume):
+    # Running indicator state after every bar has been applied
+    state = np.zeros(STATE_SIZE)
+    for i in range(len(close)):
+        _step(state, close[i], volume[i])
+    return state
+
+@njit(cache=True)
+def _advance(state, price, volume):
+    # Two-row tail (previous, latest) for a new bar on top of `state`, which is left untouched,
+    # plus the average volume of the four bars before the new one
+    tail = np.empty((2, TAIL_SIZE))
+    tail[0] = state[:TAIL_SIZE]
+    latest = state.copy()
+    _step(latest, price, volume)
+    tail[1] = latest[:TAIL_SIZE]
+    return tail, latest[VOLUME_1:VOLUME_4 + 1].mean()
+
+@njit(cache=True)
+def _chart_series(close, volume, bars):
+    # EMA(9), EMA(50) and MACD histogram for the last `bars` days, from the same single pass
+    n = len(close)
+    start = max(n - bars, 0)
+    series = np.empty((3, n - start))
+    state = np.zeros(STATE_SIZE)
+    for i in range(n):
+        _step(state, close[i], volume[i])
+        if i >= start:
+            series[0, i - start] = state[EMA_9]
+            series[1, i - start] = state[EMA_50]
+            series[2, i - start] = state[MACD_HIST]
+    return series
+
+@njit(cache=True)
+def _entry_signal(previous, latest, avg_volume_4):
+    # Cheapest and most selective checks first so `and` short-circuits on most days
+    return (
+        latest[MACD_HIST] > 0
+        and latest[CLOSE] > latest[EMA_50] and previous[CLOSE] <= previous[EMA_50]
+        and latest[EMA_50] > latest[EMA_9] and latest[EMA_50] > latest[EMA_21]
+        and 40 <= latest[RSI] <= 70 and latest[RSI] > latest[RSI_EMA_20]
+        and latest[VOLUME] > avg_volume_4
+    )
+
+@njit(cache=True)
+def _strategy_mask(close, volume):
+    # Entry signal for every bar, shared by the live check and the backtest,
+    # plus the indicator state after the last bar
+    mask = np.zeros(len(close), dtype=np.bool_)
+    state = np.zeros(STATE_SIZE)
+    previous = np.empty(TAIL_SIZE)
+    for i in range(len(close)):
+        previous[:] = state[:TAIL_SIZE]
+        _step(state, close[i], volume[i])
+        mask[i] = _entry_signal(previous, state, state[VOLUME_1:VOLUME_4 + 1].mean())
+    return mask, state
+
+# Compiled eagerly for float32 Close/Volume arrays (cached on disk), so the first /check
+# after startup doesn't pay JIT latency. The arrays are typed read-only because pandas
+# copy-on-write hands out read-only views; writable arrays are accepted as well.
+@njit(
+    'Tuple((b1, f4, f4, f4, f4, f4))'
+    '(Array(f4, 1, "A", readonly=True), Array(f4, 1, "A", readonly=True))',
+    cache=True
+)
+def _check(close, volume):
+    # (has_signal, price, rsi, macd_hist, ema50, avg_volume_4) for the last bar
+    mask, state = _strategy_mask(close, volume)
+    return (
+        mask[-1], state[CLOSE], state[RSI], state[MACD_HIST], state[EMA_50],
+        state[VOLUME_1:VOLUME_4 + 1].mean()
+    )
+
+# ==================== CHART ====================
+# One figure is built at startup and reused: each chart only swaps the artists' data.
+# It is a plain Agg figure (not managed by pyplot), so it can be drawn from worker threads.
+CHART_BARS = 30
+_FIG = Figure(figsize=(10, 6))
+FigureCanvasAgg(_FIG)
+_AX = _FIG.subplots()
+_chart_dates = pd.date_range('2000-01-01', periods=CHART_BARS)  # Placeholder until the first chart
+_chart_zeros = np.zeros(CHART_BARS)
+(_price_line,) = _AX.plot(_chart_dates, _chart_zeros, label='Price', color='blue')
+(_ema9_line,) = _AX.plot(_chart_dates, _chart_zeros, label='9 EMA', color='orange', linestyle='--')
+(_ema50_line,) = _AX.plot(_chart_dates, _chart_zeros, label='50 EMA', color='red')
+_hist_bars = _AX.bar(_chart_dates, _chart_zeros)
+_AX.legend()
+# Matplotlib state is global, so only one chart may be drawn at a time
+_CHART_LOCK = threading.Lock()
+
+def render_chart(ticker_symbol, dates, close, ema9, ema50, macd_hist):
+    x = mdates.date2num(dates)
+    colors = np.where(macd_hist >= 0, 'g', 'r')
+    with _CHART_LOCK:
+        _price_line.set_data(x, close)
+        _ema9_line.set_data(x, ema9)
+        _ema50_line.set_data(x, ema50)
+        for rect, left, height, color in zip(_hist_bars, x, macd_hist, colors):
+            rect.set_x(left - rect.get_width() / 2)
+            rect.set_height(height)
+            rect.set_color(color)
+        _AX.set_title(f'{ticker_symbol} Daily Chart')
+        _AX.relim()
+        _AX.autoscale_view()
+
+        buf = io.BytesIO()
+        _FIG.savefig(buf, format='png')
+    buf.seek(0)
+    return buf
+
+async def render_png(plot):
+    # Matplotlib drawing and PNG encoding run in a worker thread so the event loop keeps serving
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, render_chart, *plot)
+# ===============================================
+
+def _signal_reply(data, price, rsi, ticker_symbol):
+    # `data` ends with the signal day; only the plotted tail is kept
+    data = _naive_dates(data)
+    close = _close(data)
+    ema9, ema50, macd_hist = _chart_series(close, data['Volume'].to_numpy(dtype=np.float32), CHART_BARS)
+    plot = (ticker_symbol, data.index[-CHART_BARS:], close[-CHART_BARS:], ema9, ema50, macd_hist)
+
+    signal = (
+        f"🚀 *STRONG BUY* {ticker_symbol}\n"
+        f"📅 {data.index[-1].strftime('%Y-%m-%d')}\n"
+        f"💰 Price: ₹{price:.2f}\n"
+        f"📈 EMA(50) > EMA(9/21): ✓\n"
+        f"📊 RSI(14): {rsi:.1f}\n"
+        f"⚡ MACD Positive: ✓\n"
+        f"🔊 Volume > Avg: ✓"
+    )
+    return signal, plot
+
+# Evaluates the daily strategy on an already downloaded frame (no network access)
+def evaluate_strategy(data, ticker_symbol):
+    if len(data) < 50:
+        return False, "Insufficient data", None
+
+    has_signal, price, rsi, _, _, _ = _check(_close(data), data['Volume'].to_numpy(dtype=np.float32))
+    if has_signal:
+        signal, plot = _signal_reply(data, price, rsi, ticker_symbol)
+        return True, signal, plot
+    return False, None, None
 
 async def check_daily_strategy(ticker_symbol):
     try:
         stock = yf.Ticker(ticker_symbol)
-        data = stock.history(period="60d", interval="1d")
-
-        if len(data) < 50:
-            return False, "Insufficient data", None
-
-        data['EMA_9'] = calculate_ema(data, 9)
-        data['EMA_20'] = calculate_ema(data, 20)
-        data['EMA_21'] = calculate_ema(data, 21)
-        data['EMA_50'] = calculate_ema(data, 50)
-        data['RSI'] = calculate_rsi(data)
-        data['RSI_EMA_20'] = data['RSI'].ewm(span=20, adjust=False).mean()
-        data['MACD_Line'], data['Signal_Line'], data['MACD_Hist'] = calculate_macd(data)
-
-        latest = data.iloc[-1]
-        previous = data.iloc[-2]
-
-        avg_volume_4 = data['Volume'].iloc[-5:-1].mean()
-        volume_condition = latest['Volume'] > avg_volume_4
-
-        condition1 = (latest['Close'] > latest['EMA_50']) and (previous['Close'] <= previous['EMA_50'])
-        condition2 = latest['EMA_50'] > latest['EMA_9'] and latest['EMA_50'] > latest['EMA_21']
-        condition3 = 40 <= latest['RSI'] <= 70 and latest['RSI'] > latest['RSI_EMA_20']
-        condition4 = latest['MACD_Hist'] > 0
-        condition5 = volume_condition
-
-        if all([condition1, condition2, condition3, condition4, condition5]):
-            plt.figure(figsize=(10, 6))
-            plt.plot(data.index[-30:], data['Close'].iloc[-30:], label='Price', color='blue')
-            plt.plot(data.index[-30:], data['EMA_9'].iloc[-30:], label='9 EMA', color='orange', linestyle='--')
-            plt.plot(data.index[-30:], data['EMA_50'].iloc[-30:], label='50 EMA', color='red')
-            plt.bar(data.index[-30:], data['MACD_Hist'].iloc[-30:], 
-                   color=np.where(data['MACD_Hist'].iloc[-30:] >= 0, 'g', 'r'))
-            
-            plt.title(f'{ticker_symbol} Daily Chart')
-            plt.legend()
-
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png')
-            buf.seek(0)
-            plt.close()
-
-            signal = (
-                f"🚀 *STRONG BUY* {ticker_symbol}\n"
-                f"📅 {latest.name.strftime('%Y-%m-%d')}\n"
-                f"💰 Price: ₹{latest['Close']:.2f}\n"
-                f"📈 EMA(50) > EMA(9/21): ✓\n"
-                f"📊 RSI(14): {latest['RSI']:.1f}\n"
-                f"⚡ MACD Positive: ✓\n"
-                f"🔊 Volume > Avg: ✓"
-            )
-            return True, signal, buf
-        return False, None, None
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(
+            DOWNLOAD_POOL,
+            partial(stock.history, period="60d", interval="1d")
+        )
+        return evaluate_strategy(_trim(data), ticker_symbol)
     except Exception as e:
         logger.error(f"Error checking {ticker_symbol}: {str(e)}")
         return False, f"Error checking {ticker_symbol}: {str(e)}", None
 
+# ==================== HISTORY CACHE ====================
+def _naive_dates(data):
+    # Drop the exchange timezone so daily bars compare against plain dates
+    if data.index.tz is not None:
+        data = data.tz_localize(None)
+    return data
+
+def _history_path(ticker_symbol, period, day):
+    return os.path.join(CACHE_DIR, f"{ticker_symbol}_{period}_{day.isoformat()}.parquet")
+
+def _store_history(ticker_symbol, period, day, data):
+    # Only sessions completed before `day` are cached; today's bar still changes intraday
+    data = _naive_dates(data)
+    data = data[data.index < pd.Timestamp(day)]
+    path = _history_path(ticker_symbol, period, day)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for stale in glob.glob(os.path.join(CACHE_DIR, f"{ticker_symbol}_{period}_*.parquet")):
+            if stale != path:  # Today's file may be being read by an overlapping scan
+                os.remove(stale)
+        # Written to a temp file and renamed into place, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            data.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    except Exception as e:
+        logger.warning(f"Could not cache history for {ticker_symbol}: {str(e)}")
+    return data
+
+@lru_cache(maxsize=512)
+def load_history(ticker_symbol, period, day):
+    # Completed daily bars before `day` as read-only (close, volume, index_ns) arrays
+    path = _history_path(ticker_symbol, period, day)
+    if os.path.exists(path):
+        data = pd.read_parquet(path)
+    else:
+        data = _trim(yf.Ticker(ticker_symbol).history(period=period, interval="1d"))
+        if data.empty:
+            raise ValueError(f"No data returned for {ticker_symbol}")
+        data = _store_history(ticker_symbol, period, day, data)
+
+    history = (
+        data['Close'].to_numpy(dtype=np.float32),
+        data['Volume'].to_numpy(dtype=np.float32),
+        data.index.to_numpy(dtype='datetime64[ns]')
+    )
+    for array in history:
+        array.flags.writeable = False
+    return history
+
+def load_histories(tickers, period, day):
+    # Cold tickers are fetched with one batched download before reading the cache
+    missing = [ticker for ticker in tickers if not os.path.exists(_history_path(ticker, period, day))]
+    if missing:
+        panel = yf.download(
+            missing, period=period, interval="1d", group_by='ticker',
+            auto_adjust=True, threads=True, progress=False
+        )
+        for ticker in missing:
+            try:
+                data = _trim(panel[ticker].dropna(subset=['Close']))
+                if not data.empty:
+                    _store_history(ticker, period, day, data)
+            except Exception as e:
+                logger.error(f"Error downloading history for {ticker}: {str(e)}")
+
+    histories = {}
+    for ticker in tickers:
+        try:
+            histories[ticker] = load_history(ticker, period, day)
+        except Exception as e:
+            logger.error(f"Error loading history for {ticker}: {str(e)}")
+    return histories
+
+def history_frame(history, live=None):
+    # Close/Volume frame from cached arrays, optionally extended with today's live bar
+    close, volume, index_ns = history
+    data = pd.DataFrame({'Close': close, 'Volume': volume}, index=pd.DatetimeIndex(index_ns))
+    if live is not None:
+        live = _naive_dates(_trim(live.dropna(subset=['Close'])))
+        if len(data):
+            live = live[live.index > data.index[-1]]
+        data = pd.concat([data, live])
+    return data
+# =======================================================
+
+# ==================== ONLINE INDICATOR STATE ====================
+@dataclass
+class IndicatorState:
+    day: date                # IST day whose completed history was folded in
+    last_date: pd.Timestamp  # Date of the last completed bar in `values`
+    values: np.ndarray       # Running indicator state (see STATE_SIZE)
+
+# Per-ticker state, rebuilt once a day and advanced by today's bar on every scan
+_indicator_states = {}
+
+def build_indicator_states(tickers, day):
+    # Cold start: fold each ticker's cached 60-day history into a fresh state
+    for ticker, (close, volume, index_ns) in load_histories(tickers, "60d", day).items():
+        if len(close):
+            _indicator_states[ticker] = IndicatorState(day, pd.Timestamp(index_ns[-1]), _fold(close, volume))
+
+# Evaluates today's bar with a single recursion step on top of the ticker's state.
+# The bar is read straight from the panel's arrays; a frame is only built when there is a signal.
+def evaluate_live_bar(state, live, ticker_symbol):
+    close = live['Close'].to_numpy(dtype=np.float32)
+    rows = np.flatnonzero(~np.isnan(close))
+    if not len(rows) or live.index[rows[-1]].replace(tzinfo=None) <= state.last_date:
+        return False, None, None  # No session since the cached history (e.g. market holiday)
+    if state.values[BAR_COUNT] + 1 < 50:
+        return False, "Insufficient data", None
+
+    last = rows[-1]
+    tail, avg_volume_4 = _advance(state.values, close[last], live['Volume'].to_numpy(dtype=np.float32)[last])
+    previous, latest = tail
+
+    if _entry_signal(previous, latest, avg_volume_4):
+        data = history_frame(load_history(ticker_symbol, "60d", state.day), live)
+        signal, plot = _signal_reply(data, latest[CLOSE], latest[RSI], ticker_symbol)
+        return True, signal, plot
+    return False, None, None
+# ================================================================
+
 def backtest_strategy(ticker_symbol, lookback_days=700):
     try:
-        stock = yf.Ticker(ticker_symbol)
-        data = stock.history(period=f"{lookback_days}d", interval="1d")
+        today = datetime.now(IST).date()
+        data = history_frame(load_history(ticker_symbol, f"{lookback_days}d", today))
 
         if len(data) < 50:
             return f"Not enough data for {ticker_symbol}."
 
-        data['EMA_9'] = calculate_ema(data, 9)
-        data['EMA_20'] = calculate_ema(data, 20)
-        data['EMA_21'] = calculate_ema(data, 21)
-        data['EMA_50'] = calculate_ema(data, 50)
-        data['RSI'] = calculate_rsi(data)
-        data['RSI_EMA_20'] = data['RSI'].ewm(span=20, adjust=False).mean()
-        data['MACD_Line'], data['Signal_Line'], data['MACD_Hist'] = calculate_macd(data)
-
-        signals = []
-        for i in range(50, len(data)):
-            latest = data.iloc[i]
-            previous = data.iloc[i - 1]
-            avg_volume_4 = data['Volume'].iloc[i - 5:i - 1].mean()
-
-            condition1 = (latest['Close'] > latest['EMA_50']) and (previous['Close'] <= previous['EMA_50'])
-            condition2 = latest['EMA_50'] > latest['EMA_9'] and latest['EMA_50'] > latest['EMA_21']
-            condition3 = 40 <= latest['RSI'] <= 70 and latest['RSI'] > latest['RSI_EMA_20']
-            condition4 = latest['MACD_Hist'] > 0
-            volume_condition = latest['Volume'] > avg_volume_4
-
-            if all([condition1, condition2, condition3, condition4, volume_condition]):
-                signals.append((latest.name.strftime('%Y-%m-%d'), latest['Close']))
+        # Same per-bar signal as the live check, evaluated for every day in one pass
+        close = _close(data)
+        mask, _ = _strategy_mask(close, data['Volume'].to_numpy(dtype=np.float32))
+        mask[:50] = False  # Skip the EMA(50) warm-up period
+
+        signals = [(data.index[i].strftime('%Y-%m-%d'), close[i]) for i in np.flatnonzero(mask)]
 
         if not signals:
             return f"No signals found for {ticker_symbol} in last {lookback_days} days."
 
         result = f"🔙 Backtest: {ticker_symbol} (last {lookback_days} days)\n"
-        for date, price in signals:
-            result += f"📅 {date} - Price: ₹{price:.2f}\n"
+        for day, price in signals:
+            result += f"📅 {day} - Price: ₹{price:.2f}\n"
         return result
     except Exception as e:
         logger.error(f"Backtest error for {ticker_symbol}: {str(e)}")
@@ -163,41 +467,128 @@ NIFTY_200 = [
     'ICICIBANK.NS', 'KOTAKBANK.NS', 'HINDUNILVR.NS', 'ITC.NS', 'SBIN.NS'
 ]
 
+# Batched download of today's Nifty 200 bars, reused by every scan within the same hour
+_panel_cache = {'hour': None, 'panel': None}
+
+# Telegram albums hold 2-10 photos and go out in a single request
+MEDIA_GROUP_SIZE = 10
+
+async def send_with_retry(send, **kwargs):
+    # Albums count as one message per photo towards the per-chat flood limit; when Telegram
+    # answers with RetryAfter, wait as long as it asks and try once more
+    try:
+        return await send(**kwargs)
+    except RetryAfter as e:
+        delay = e.retry_after
+        if isinstance(delay, timedelta):
+            delay = delay.total_seconds()
+        logger.warning(f"Telegram flood limit hit, retrying in {delay}s")
+        await asyncio.sleep(delay)
+        return await send(**kwargs)
+
+def download_nifty_panel(hour):
+    if _panel_cache['hour'] == hour:
+        return _panel_cache['panel']
+    panel = yf.download(
+        NIFTY_200, period="1d", interval="1d", group_by='ticker',
+        auto_adjust=True, threads=True, progress=False
+    )
+    # An empty result is usually a transient Yahoo failure, so it is not kept for the hour
+    if not panel.empty:
+        _panel_cache['panel'] = panel
+        _panel_cache['hour'] = hour
+    return panel
+
 async def send_auto_signals(context: CallbackContext):
     if not CHAT_ID:
         logger.error("CHAT_ID not set")
         return
     
-    ist = pytz.timezone('Asia/Kolkata')
-    now = datetime.now(ist)
+    now = datetime.now(IST)
     
     if now.weekday() >= 5:  # Skip weekends
         return
     
-    market_open = time(9, 15, tzinfo=ist)
-    market_close = time(15, 30, tzinfo=ist)
-    
-    if not (market_open <= now.time() <= market_close):
+    minutes = now.hour * 60 + now.minute
+    if not (MARKET_OPEN_MIN <= minutes <= MARKET_CLOSE_MIN):
         return
     
     logger.info(f"Scanning Nifty 200 at {now.strftime('%H:%M')}")
     
-    signals_found = 0
+    # States are rebuilt from the cached history once a day; each hour only today's bar
+    # is downloaded and applied on top of them
+    today = now.date()
+    loop = asyncio.get_running_loop()
+    stale = [
+        ticker for ticker in NIFTY_200
+        if ticker not in _indicator_states or _indicator_states[ticker].day != today
+    ]
+    if stale:
+        await loop.run_in_executor(DOWNLOAD_POOL, build_indicator_states, stale, today)
+    panel = await loop.run_in_executor(
+        DOWNLOAD_POOL,
+        download_nifty_panel,
+        now.strftime('%Y-%m-%d %H')
+    )
+
+    signals = []
     for ticker in NIFTY_200:
+        state = _indicator_states.get(ticker)
+        if state is None or state.day != today:
+            continue
         try:
-            has_signal, message, chart = await check_daily_strategy(ticker)
+            has_signal, message, plot = evaluate_live_bar(state, panel[ticker], ticker)
             if has_signal:
-                await context.bot.send_photo(
+                signals.append((ticker, message, plot))
+        except Exception as e:
+            logger.error(f"Error processing {ticker}: {str(e)}")
+            continue
+
+    # Each chart is rendered on its own so one failure only drops that signal
+    charts = []
+    for ticker, message, plot in signals:
+        try:
+            charts.append((ticker, message, (await render_png(plot)).getvalue()))
+        except Exception as e:
+            logger.error(f"Error rendering chart for {ticker}: {str(e)}")
+
+    # Signals go out as albums of up to MEDIA_GROUP_SIZE charts, one request per album.
+    # Only an album Telegram rejected (BadRequest) is resent one by one: after a timeout or
+    # network error it may already have been delivered, so resending would duplicate it.
+    signals_found = 0
+    for first in range(0, len(charts), MEDIA_GROUP_SIZE):
+        batch = charts[first:first + MEDIA_GROUP_SIZE]
+        if len(batch) > 1:
+            try:
+                await send_with_retry(
+                    context.bot.send_media_group,
+                    chat_id=CHAT_ID,
+                    media=[
+                        InputMediaPhoto(chart, caption=message, parse_mode='Markdown')
+                        for _, message, chart in batch
+                    ]
+                )
+                signals_found += len(batch)
+                continue
+            except BadRequest as e:
+                logger.error(f"Signal album rejected, falling back to single photos: {str(e)}")
+            except Exception as e:
+                tickers = ', '.join(ticker for ticker, _, _ in batch)
+                logger.error(f"Error sending signal album for {tickers}: {str(e)}")
+                signals_found += len(batch)  # Possibly delivered, so don't also report "no signals"
+                continue
+        for ticker, message, chart in batch:
+            try:
+                await send_with_retry(
+                    context.bot.send_photo,
                     chat_id=CHAT_ID,
                     photo=chart,
                     caption=message,
                     parse_mode='Markdown'
                 )
                 signals_found += 1
-                await asyncio.sleep(1)
-        except Exception as e:
-            logger.error(f"Error processing {ticker}: {str(e)}")
-            continue
+            except Exception as e:
+                logger.error(f"Error sending signal for {ticker}: {str(e)}")
     
     if signals_found == 0:
         await context.bot.send_message(
@@ -225,10 +616,10 @@ async def check_stock(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if '.' not in ticker:
         ticker += '.NS'
     
-    has_signal, message, chart = await check_daily_strategy(ticker)
+    has_signal, message, plot = await check_daily_strategy(ticker)
     
     if has_signal:
-        await update.message.reply_photo(photo=chart, caption=message, parse_mode='Markdown')
+        await update.message.reply_photo(photo=await render_png(plot), caption=message, parse_mode='Markdown')
     elif message:
         await update.message.reply_text(message)
     else:
@@ -283,7 +674,7 @@ def main():
         )
         job_queue.run_daily(
             send_auto_signals,
-            time=time(9, 15, tzinfo=pytz.timezone('Asia/Kolkata')),
+            time=time(9, 15, tzinfo=IST),
             days=(0, 1, 2, 3, 4)
         )
         job_queue.scheduler.add_listener(